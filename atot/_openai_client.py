@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""모듈 간 공유하는 OpenAI 클라이언트"""
+import os
+
+import httpx
+from openai import OpenAI
+from dotenv import load_dotenv
+
+load_dotenv()  # 이 줄이 반드시 있어야 함
+
+API_KEY = os.getenv("OPENAI_API_KEY", "your-api-key")
+
+# 모든 모듈이 하나의 클라이언트/커넥션 풀을 공유
+# → Whisper 호출마다 TCP+TLS 핸드셰이크를 새로 하지 않음 (keep-alive 재사용)
+CLIENT = OpenAI(
+    api_key=API_KEY,
+    http_client=httpx.Client(
+        # connect는 짧게(서버 다운 시 빠른 실패), read는 Whisper 전사 시간만큼 여유 있게
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=16),
+    ),
+)
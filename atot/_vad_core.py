@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""VAD 활동 감지 상태머신의 Numba 컴파일 코어"""
+from numba import njit
+
+# 상태 코드 (nopython 모드 유지를 위해 문자열 대신 int로 인코딩)
+STATUS_SILENT = 0
+STATUS_SPEECH = 1
+STATUS_FINISHED = 2
+STATUS_ERROR = 3
+STATUS_RESET = 4
+
+# int 코드 → 기존 상태 문자열 매핑
+STATUS_NAMES = ("Silent", "Speech", "Finished", "Error", "Reset")
+
+
+_PEAK_SIGNATURES = [
+    "b1(f4[::1], f8)",
+    "b1(i2[::1], f8)",
+]
+
+
+@njit(_PEAK_SIGNATURES, cache=True, fastmath=True, boundscheck=False)
+def peak_below(chunk, threshold):
+    """
+    배치 피크가 임계값 미만인지 검사 (명백한 무음 판정)
+
+    np.abs(...).max()의 중간 배열 할당 없이 한 번의 컴파일된 패스로 계산합니다.
+    int16 입력은 호출 측에서 임계값을 32768 배율로 맞춰 전달합니다.
+
+    Args:
+        chunk (np.array): 오디오 배치 (float32 또는 int16, 1차원)
+        threshold (float): 무음으로 간주할 피크 임계값
+
+    Returns:
+        bool: 피크가 임계값 미만이면 True
+    """
+    peak = 0.0
+    for i in range(chunk.shape[0]):
+        # i2는 -(-32768)이 오버플로로 다시 음수가 되므로 float로 올려서 반전
+        v = float(chunk[i])
+        if v < 0.0:
+            v = -v
+        if v > peak:
+            peak = v
+    return peak < threshold
+
+
+# 명시적 시그니처로 import 시점에 컴파일 (첫 호출의 JIT 지연 제거)
+# 파이프라인이 float32/int16 양쪽을 지원하므로 두 시그니처를 등록
+# 인덱스는 자체 커서 계산으로 범위가 보장되므로 boundscheck 생략
+_SIGNATURES = [
+    "Tuple((b1, i8, i8, i8))(b1, b1, i8, i8, i8, i8, f4[::1], f4[::1])",
+    "Tuple((b1, i8, i8, i8))(b1, b1, i8, i8, i8, i8, i2[::1], i2[::1])",
+]
+
+
+@njit(_SIGNATURES, cache=True, fastmath=True, boundscheck=False)
+def step(has_speech,
+         is_recording,
+         cursor,
+         stop_count,
+         silence_threshold,
+         exit_threshold,
+         buf,
+         chunk):
+    """
+    청크 단위 활동 감지 스텝 (nopython 모드)
+
+    버퍼 기록과 카운터 갱신을 인터프리터 없이 한 번에 처리합니다.
+    버퍼 확장은 호출 측에서 사전에 보장해야 합니다.
+
+    Args:
+        has_speech (bool): 현재 청크에서 음성이 감지되었는지 여부
+        is_recording (bool): 현재 녹음중 여부
+        cursor (int): 버퍼에 기록된 샘플 수
+        stop_count (int): 연속 무음 카운트
+        silence_threshold (int): 녹음 종료로 간주하는 연속 무음 임계값
+        exit_threshold (int): 시스템 종료로 간주하는 연속 무음 임계값
+        buf (np.array): 발화 누적 버퍼 (float32)
+        chunk (np.array): 현재 오디오 청크 (float32, 1차원)
+
+    Returns:
+        tuple: (is_recording, cursor, stop_count, status_code)
+    """
+    n = chunk.shape[0]
+    status = STATUS_SILENT
+
+    if has_speech:
+        if not is_recording:
+            is_recording = True
+            stop_count = 0
+            cursor = 0
+        buf[cursor:cursor + n] = chunk
+        cursor += n
+        stop_count = 0
+        status = STATUS_SPEECH
+    else:  # 무음
+        if is_recording:
+            buf[cursor:cursor + n] = 0
+            cursor += n
+            stop_count += 1
+            status = STATUS_SPEECH  # 무음이어도 녹음중이니 Speech
+            if stop_count >= silence_threshold:
+                is_recording = False
+                stop_count = 0
+                status = STATUS_FINISHED
+        else:
+            stop_count += 1
+            if stop_count >= exit_threshold:
+                status = STATUS_ERROR
+
+    return is_recording, cursor, stop_count, status
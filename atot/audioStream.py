@@ -1,16 +1,10 @@
 #!/usr/bin/env python3
 """실시간 음성 인식 시스템"""
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
+from _openai_client import API_KEY, CLIENT as client  # ← 공유 OpenAI 클라이언트
 
-load_dotenv()  # 이 줄이 반드시 있어야 함
-
-# OpenAI API 키 설정
-api_key = os.getenv("OPENAI_API_KEY", "your-api-key")
-if api_key == "your-api-key":
+# OpenAI API 키 설정 확인
+if API_KEY == "your-api-key":
     raise ValueError("OpenAI API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
-client = OpenAI(api_key=api_key)
 
 
 # ========== PUBLIC API ==========
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """실시간 음성 인식 시스템"""
-import queue
+import functools
+import io
+import logging
 import sys
+import threading
 from openai import OpenAI
 import time
 from silero_vad import load_silero_vad, get_speech_timestamps
@@ -19,8 +22,8 @@ load_dotenv()  # 이 줄이 반드시 있어야 함
 api_key = os.getenv("OPENAI_API_KEY", "your-api-key")
 client = OpenAI(api_key=api_key)
 
-# 전역 VAD 모델 (싱글톤 패턴)
-_vad_model = None
+# VAD 디버그 로거 (운영 환경에서는 레벨 설정만으로 비활성화 가능)
+logger = logging.getLogger("vad")
 
 class AudioConfig:
     """오디오 설정 상수"""
@@ -31,6 +34,10 @@ class AudioConfig:
     BATCH_SIZE = 100
     SILENCE_THRESHOLD = 3
 
+# 무음 패딩용 공유 제로 버퍼 (무음 청크마다 새로 할당하지 않음; 내용 변경 금지)
+_ZERO_CHUNK = np.zeros(AudioConfig.BATCH_SIZE * AudioConfig.CHUNKSIZE,
+                       dtype=np.int16)
+
 class _VADModel:
     """
     음성을 감지하는 VAD 모델 래퍼 클래스 (private)
@@ -53,11 +60,19 @@ class _VADModel:
     """    
     def get_speech_timestamps(self, audio_data)->list:
 
-        print(f"[VAD] audio_data type: {type(audio_data)}")
-        print(f"[VAD] audio_data dtype: {audio_data.dtype}")
-        print(f"[VAD] audio_data shape: {audio_data.shape}")
-        print(f"[VAD] audio_data range: [{audio_data.min():.4f}, {audio_data.max():.4f}]")
-  
+        if logger.isEnabledFor(logging.DEBUG):
+            # min/max는 O(N) 연산이므로 디버그가 켜진 경우에만 계산
+            logger.debug("[VAD] audio_data type: %s", type(audio_data))
+            logger.debug("[VAD] audio_data dtype: %s", audio_data.dtype)
+            logger.debug("[VAD] audio_data shape: %s", audio_data.shape)
+            logger.debug("[VAD] audio_data range: [%.4f, %.4f]",
+                         audio_data.min(), audio_data.max())
+
+        if audio_data.dtype == np.int16:
+            # int16 파이프라인은 silero 호출 직전에 한 번만 float32로 변환
+            audio_data = audio_data.astype(np.float32)
+            audio_data *= 1.0 / 32768.0
+
         return get_speech_timestamps(
             audio_data,
             self.model,
@@ -71,12 +86,28 @@ class _AudioStream:
     추후 프론트엔드와 협의해서 실시간으로 청크를 받아들인다고 하면 필요없는 클래스
     
     Attributes:
-        queue:  오디오 청크를 저장하는 큐
         stream: 사운드디바이스 입력 스트림
+        _ring:  콜백이 기록하는 사전 할당 슬롯 링 (단일 생산자/단일 소비자)
+        _w/_r:  링의 쓰기/읽기 인덱스 (생산자는 _w만, 소비자는 _r만 갱신 → 락 불필요)
+        _ready: 새 청크 도착을 소비자에게 알리는 이벤트 (빈 링에서 폴링 제거)
+        _batch: 배치 수집용 사전 할당 버퍼 (호출마다 재사용)
+        _dropped: 링이 가득 차서 버린 청크 수 (소비자가 전사 등으로 지연될 때)
     """
+
+    RING_N = AudioConfig.BATCH_SIZE * 4  # 링 슬롯 수 (배치 4개 분량 여유)
+
     def __init__(self)-> None:
-        self.queue = queue.Queue()
         self.stream = None
+        # 콜백(RT 스레드)이 할당/락 없이 기록할 수 있는 슬롯 링
+        self._ring = np.empty((self.RING_N, AudioConfig.CHUNKSIZE),
+                              dtype=np.int16)
+        self._w = 0
+        self._r = 0
+        self._dropped = 0
+        self._ready = threading.Event()
+        # 청크 크기/개수가 고정이므로 배치 버퍼를 한 번만 할당
+        self._batch = np.empty(AudioConfig.BATCH_SIZE * AudioConfig.CHUNKSIZE,
+                               dtype=np.int16)
 
 
     def init_stream(self):
@@ -89,7 +120,8 @@ class _AudioStream:
                 device=AudioConfig.DEVICE,
                 blocksize=AudioConfig.CHUNKSIZE,
                 channels=AudioConfig.CHANNELS,
-                samplerate=AudioConfig.SAMPLERATE, 
+                samplerate=AudioConfig.SAMPLERATE,
+                dtype='int16',  # PortAudio가 int16으로 바로 전달 (콜백 변환/대역폭 절감)
                 callback=self._audio_callback
             )
             print("오디오 스트림 초기화 완료")
@@ -131,19 +163,26 @@ class _AudioStream:
         Args:
             target (int): 수집할 청크의 개수, 총 샘플의 개수는 입력단위로 받는 샘플수 * target 으로 계산
         Returns:
-            np.array: 수집된 오디오 신호 배열
+            np.array: 수집된 오디오 신호 배열 (재사용 버퍼의 뷰이므로 호출 측에서 보관 금지)
 
-        """    
-        chunks = []
-        
-        try:
-            while len(chunks) < target:
-                chunk = self.queue.get(timeout=1.0)
-                chunks.append(chunk)
-        except queue.Empty:
-            pass
-            
-        return np.concatenate(chunks, axis=0).squeeze() if chunks else None
+        """
+        size = AudioConfig.CHUNKSIZE
+        filled = 0
+
+        while filled < target:
+            if self._r == self._w:  # 링이 비어있음
+                # 콜백이 깨워줄 때까지 대기 (1초간 새 청크가 없으면 종료)
+                if not self._ready.wait(timeout=1.0):
+                    break
+                self._ready.clear()
+                continue
+            # 고정 크기 청크를 사전 할당 버퍼에 바로 기록 (list + concatenate + squeeze 제거)
+            self._batch[filled * size:(filled + 1) * size] = \
+                self._ring[self._r % self.RING_N]
+            self._r += 1
+            filled += 1
+
+        return self._batch[:filled * size] if filled else None
         
     def _audio_callback(self, indata, frames, time, status):
         """
@@ -157,11 +196,19 @@ class _AudioStream:
         Returns:
             None
 
-        """            
-        
+        """
+
         if status:
             print(status, file=sys.stderr)
-        self.queue.put(indata.copy())
+        # 소비자가 전사 호출 등으로 지연되어 링이 가득 차면 이번 청크를 버림
+        # (읽는 중인 슬롯을 덮어써서 배치가 뒤섞이는 것보다 예측 가능한 손실이 낫다)
+        if self._w - self._r >= self.RING_N:
+            self._dropped += 1
+            return
+        # RT 스레드에서는 할당/큐 락 없이 사전 할당 슬롯에 memcpy만 수행
+        self._ring[self._w % self.RING_N] = indata[:, 0]
+        self._w += 1
+        self._ready.set()
 
 
 class _AudioActivityDetection:
@@ -203,7 +250,8 @@ class _AudioActivityDetection:
                 self.speech_buffer = []
                 print("🎤 음성 시작")
             
-            self.speech_buffer.append(audio_buffer)
+            # process_audio_batch의 배치 버퍼는 재사용되므로 보관용으로는 복사본을 저장
+            self.speech_buffer.append(audio_buffer.copy())
             
             if self.stop_count > 0:
                 print(f"음성 재감지 → 무음 카운트 리셋 ({self.stop_count} → 0)")
@@ -211,8 +259,8 @@ class _AudioActivityDetection:
             
         else:  # 무음
             if self.is_recording:
-                zero_data = np.zeros_like(audio_buffer)
-                self.speech_buffer.append(zero_data)
+                # 공유 제로 버퍼의 뷰를 저장 (무음 청크마다 새 배열을 할당하지 않음)
+                self.speech_buffer.append(_ZERO_CHUNK[:audio_buffer.shape[0]])
                 self.stop_count += 1
                 
                 print(f"연속 무음: {self.stop_count}/{self.silence_threshold}")
@@ -229,17 +277,15 @@ class _AudioActivityDetection:
         return None
 
 
+@functools.cache
 def _get_vad_model():
     """
-    전역 VAD 모델 싱글톤 인스턴스를 반환하는 내부 함수
+    전역 VAD 모델 싱글톤 인스턴스를 반환하는 내부 함수 (최초 호출 시 1회만 로드)
 
     Returns:
         _VADModel: VAD 모델 인스턴스
     """
-    global _vad_model
-    if _vad_model is None:
-        _vad_model = _VADModel()
-    return _vad_model
+    return _VADModel()
 
 
 def _listen_and_transcribe():
@@ -255,8 +301,10 @@ def _listen_and_transcribe():
 
     while True:
             audio_data = stream.process_audio_batch()
-            print(f"오디오 데이터 수신: {audio_data.shape if audio_data is not None else None}")
-            print(audio_data)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("오디오 데이터 수신: %s",
+                             audio_data.shape if audio_data is not None else None)
+                logger.debug("%s", audio_data)
             
             if audio_data is not None:
                 speech_timestamps = vad_model.get_speech_timestamps(audio_data)
@@ -266,17 +314,19 @@ def _listen_and_transcribe():
                 print("이벤트 체크 완료")
                 
                 if result is not None:
-                    
-                    # 임시 파일로 저장
-                    sf.write("temp_audio.wav", result, samplerate=AudioConfig.SAMPLERATE)
+
+                    # 디스크 왕복 없이 메모리 내 WAV로 인코딩 (임시 파일 저장/재읽기 제거)
+                    wav_buf = io.BytesIO()
+                    sf.write(wav_buf, result, samplerate=AudioConfig.SAMPLERATE,
+                             format="WAV", subtype="PCM_16")
+                    wav_buf.seek(0)
 
                     # OpenAI Whisper API로 전사
-                    with open("temp_audio.wav", "rb") as audio_file:
-                        response = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            language="ko"
-                        )
+                    response = client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=("audio.wav", wav_buf, "audio/wav"),
+                        language="ko"
+                    )
 
                     transcript_text = response.text
                     print(f"변환된 텍스트: {transcript_text}")
@@ -1,8 +1,11 @@
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+import aiofiles
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import uuid
 import os
 
@@ -11,6 +14,14 @@ import model
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def _setup_executor():
+    """블로킹 모델 호출(Whisper HTTP)용 기본 스레드 풀 크기 설정"""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=int(os.getenv("THREAD_POOL_SIZE", "32")))
+    )
+
 # 정적 파일 및 템플릿 경로 설정
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
@@ -18,22 +29,58 @@ templates = Jinja2Templates(directory="templates")
 UPLOAD_DIR = Path("static/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-def keep_only_this_file(latest_path: Path):
-    """새로 업로드시 latest_path를 제외한 업로드 폴더 내 모든 파일을 삭제"""
-    for p in UPLOAD_DIR.iterdir():
+# 최신 업로드 파일명을 담는 디스크 포인터 (워커 간 공유, os.replace로 원자적 갱신)
+POINTER_PATH = UPLOAD_DIR / "current"
+
+def _scan_latest_audio() -> Optional[Path]:
+    """서버 시작 시 1회만 업로드 폴더를 스캔하여 가장 최근 파일을 찾음"""
+    latest = None
+    latest_mtime = 0.0
+    # os.scandir는 stat 정보를 함께 가져오므로 파일마다 별도 stat 호출/리스트 생성이 없음
+    with os.scandir(UPLOAD_DIR) as it:
+        for entry in it:
+            if (entry.is_file()
+                    and entry.name != POINTER_PATH.name
+                    and not entry.name.endswith(".tmp")):
+                mtime = entry.stat().st_mtime
+                if latest is None or mtime > latest_mtime:
+                    latest = entry.path
+                    latest_mtime = mtime
+    return Path(latest) if latest is not None else None
+
+def _read_latest_pointer() -> Optional[Path]:
+    """다른 워커가 기록했을 수 있는 최신 업로드 파일명을 포인터에서 읽음"""
+    try:
+        name = POINTER_PATH.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return UPLOAD_DIR / name if name else None
+
+# 프로세스 내 캐시는 포인터 파일이 없을 때의 폴백 (요청마다 디렉터리 전체 스캔 방지)
+app.state.latest_audio = _read_latest_pointer() or _scan_latest_audio()
+
+def track_latest_audio(latest_path: Path):
+    """새 업로드를 최신으로 기록하고 직전 업로드 파일만 삭제"""
+    previous = _read_latest_pointer() or app.state.latest_audio
+    # 임시 파일에 쓴 뒤 os.replace로 교체 → 멀티 워커(--workers)에서도 포인터가 항상 일관됨
+    tmp = UPLOAD_DIR / f"current.{os.getpid()}.tmp"
+    tmp.write_text(latest_path.name, encoding="utf-8")
+    os.replace(tmp, POINTER_PATH)
+    app.state.latest_audio = latest_path
+    if previous is not None and previous.resolve() != latest_path.resolve():
         try:
-            if p.is_file() and p.resolve() != latest_path.resolve():
-                p.unlink(missing_ok=True)
+            previous.unlink(missing_ok=True)
         except Exception:
             # 삭제 실패는 앱 동작에 치명적이지 않으므로 무시
             pass
 
 def get_latest_audio_path() -> Optional[Path]:
-    files = [p for p in UPLOAD_DIR.iterdir() if p.is_file()]
-    if not files:
-        return None
-    files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return files[0]
+    # 다른 워커가 받은 업로드도 보이도록 디스크 포인터를 우선 확인
+    latest = _read_latest_pointer()
+    if latest is not None:
+        app.state.latest_audio = latest
+        return latest
+    return app.state.latest_audio
 
 @app.get("/", response_class=HTMLResponse)  #최초 설정
 async def read_root(request: Request):
@@ -65,11 +112,12 @@ async def submit(
         safe_name = f"{uuid.uuid4().hex}{suffix}"
         save_path = UPLOAD_DIR / safe_name
 
-        # 파일 저장
-        with save_path.open("wb") as f:
-            f.write(await audio_file.read())
+        # 파일 저장 (64KB 청크 스트리밍 → 전체 파일을 메모리에 올리지 않고 루프도 막지 않음)
+        async with aiofiles.open(save_path, "wb") as f:
+            while chunk := await audio_file.read(1 << 16):
+                await f.write(chunk)
 
-        keep_only_this_file(save_path)
+        track_latest_audio(save_path)
 
         audio_url = f"/static/uploads/{safe_name}"
     else:
@@ -93,16 +141,17 @@ async def run_model_endpoint(
         if mode == "audio":
             latest = get_latest_audio_path()
             if not latest:
-                return JSONResponse({"ok": False, "error": "오디오가 없습니다."}, status_code=400)
-            result = model.run_model(user_text=None, audio_path=str(latest))
-            return JSONResponse({"ok": True, "picked": {"picked": "audio"}, "result": result})
+                return ORJSONResponse({"ok": False, "error": "오디오가 없습니다."}, status_code=400)
+            # 블로킹 전사 호출이 이벤트 루프를 막지 않도록 스레드로 오프로드
+            result = await asyncio.to_thread(model.run_model, user_text=None, audio_path=str(latest))
+            return ORJSONResponse({"ok": True, "picked": {"picked": "audio"}, "result": result})
 
         # mode == "text"
         text = (user_input or "").strip()
         if not text:
-            return JSONResponse({"ok": False, "error": "텍스트가 없습니다."}, status_code=400)
-        result = model.run_model(user_text=text, audio_path=None)
-        return JSONResponse({"ok": True, "picked": {"picked": "text", "text": text}, "result": result})
+            return ORJSONResponse({"ok": False, "error": "텍스트가 없습니다."}, status_code=400)
+        result = await asyncio.to_thread(model.run_model, user_text=text, audio_path=None)
+        return ORJSONResponse({"ok": True, "picked": {"picked": "text", "text": text}, "result": result})
 
     except Exception as e:
-        return JSONResponse({"ok": False, "error": f"서버 내부 오류: {str(e)}"}, status_code=500)
\ No newline at end of file
+        return ORJSONResponse({"ok": False, "error": f"서버 내부 오류: {str(e)}"}, status_code=500)
\ No newline at end of file
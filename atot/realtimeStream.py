@@ -1,24 +1,45 @@
 #!/usr/bin/env python3
 """실시간 음성 인식 시스템"""
 import dataclasses
-import queue
-import sys
-from librosa import stream
-from openai import OpenAI
-import time
+import functools
+import io
+import logging
+import struct
 from silero_vad import load_silero_vad, get_speech_timestamps
-import soundfile as sf
 import numpy as np
-import sounddevice as sd
-import os
-from dotenv import load_dotenv
+import torch
 
-load_dotenv()  # 이 줄이 반드시 있어야 함
+import _vad_core  # ← Numba 컴파일된 상태머신 코어
+from _openai_client import CLIENT as client  # ← 공유 OpenAI 클라이언트
 
+# VAD 디버그 로거 (운영 환경에서는 레벨 설정만으로 비활성화 가능)
+logger = logging.getLogger("vad")
 
-# OpenAI API 키 설정
-api_key = os.getenv("OPENAI_API_KEY", "your-api-key")
-client = OpenAI(api_key=api_key)
+_WAV_HEADER_SIZE = 44
+
+
+def _make_wav_header(num_bytes: int, samplerate: int, channels: int = 1) -> bytes:
+    """
+    PCM_16 WAV의 44바이트 RIFF 헤더를 생성합니다.
+
+    포맷이 고정(모노/16kHz/PCM_16)이므로 libsndfile을 거치지 않고
+    헤더를 직접 기록합니다.
+
+    Args:
+        num_bytes (int): data 청크의 바이트 수
+        samplerate (int): 샘플링 레이트
+        channels (int): 채널 수 (기본값: 1)
+
+    Returns:
+        bytes: 44바이트 RIFF 헤더
+    """
+    byte_rate = samplerate * channels * 2
+    return b"".join([
+        b"RIFF", struct.pack("<I", 36 + num_bytes), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, channels, samplerate,
+                             byte_rate, channels * 2, 16),
+        b"data", struct.pack("<I", num_bytes),
+    ])
 
 @dataclasses.dataclass
 class AudioConfig:
@@ -26,6 +47,8 @@ class AudioConfig:
     SAMPLERATE = 16000
     SILENCE_THRESHOLD = 3
     EXIT_THRESHOLD = 10
+    MAX_UTTER_SEC = 30
+    SILENCE_PEAK = 0.01  # 이보다 작은 피크는 명백한 무음으로 간주 (노이즈 플로어에 맞춰 조정)
 
 
 class VADModel:
@@ -37,6 +60,13 @@ class VADModel:
         model: 로드된 VAD 모델
     """
     def __init__(self,monitoring = False)-> None:
+        # 배치가 6400 샘플 수준으로 작아 스레드 풀 기상 비용이 연산보다 큼 → 단일 스레드 고정
+        torch.set_num_threads(1)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # 이미 병렬 작업이 시작된 경우(리로드 등)에는 변경 불가 → 무시
+            pass
         self.model = load_silero_vad()
         self.SAMPLERATE = AudioConfig.SAMPLERATE
         self.monitoring = monitoring
@@ -51,17 +81,26 @@ class VADModel:
         list: 감지된 음성 구간의 타임스탬프 리스트
     """    
     def get_speech_timestamps(self, audio_data)->list:
-        if self.monitoring:
-            print(f"[VAD] audio_data type: {type(audio_data)}")
-            print(f"[VAD] audio_data dtype: {audio_data.dtype}")
-            print(f"[VAD] audio_data shape: {audio_data.shape}")
-            print(f"[VAD] audio_data range: [{audio_data.min():.4f}, {audio_data.max():.4f}]")
-  
-        return get_speech_timestamps(
-            audio_data,
-            self.model,
-            sampling_rate = self.SAMPLERATE,
-        )
+        if self.monitoring and logger.isEnabledFor(logging.DEBUG):
+            # min/max는 O(N) 연산이므로 디버그가 켜진 경우에만 계산
+            logger.debug("[VAD] audio_data type: %s", type(audio_data))
+            logger.debug("[VAD] audio_data dtype: %s", audio_data.dtype)
+            logger.debug("[VAD] audio_data shape: %s", audio_data.shape)
+            logger.debug("[VAD] audio_data range: [%.4f, %.4f]",
+                         audio_data.min(), audio_data.max())
+
+        if audio_data.dtype == np.int16:
+            # int16 파이프라인은 silero 호출 직전에 한 번만 float32로 변환
+            audio_data = audio_data.astype(np.float32)
+            audio_data *= 1.0 / 32768.0
+
+        # autograd 기록을 생략하고 추론 전용 모드로 실행
+        with torch.inference_mode():
+            return get_speech_timestamps(
+                audio_data,
+                self.model,
+                sampling_rate = self.SAMPLERATE,
+            )
 
 
 
@@ -78,31 +117,83 @@ class _AudioActivityDetection:
     Attributes:
         is_recording:  현재 녹음중인 여부로 최초로 음성이 감지되면 True로 변경되고,
                        연속으로 무음이 silence_threshold번 감지되면 False로 변경됩니다.
-        speech_buffer: 녹음된 음성 데이터를 저장하는 버퍼  
+        _buf: 녹음된 음성 데이터를 저장하는 사전 할당 버퍼 (chunk 마다 새로 할당하지 않음)
+        _cursor: 버퍼에 기록된 샘플 수
         stop_count: 연속 무음 카운트
         silence_threshold: 연속 무음으로 간주하는 임계값
         exit_threshold: 연속 무음으로 간주하여 시스템 종료하는 임계값
-    
+
     Methods:
         resetStream(): 스트림 상태 초기화
         __call__(speech_detected, audio_buffer): 음성 데이터에서 화자 활동을 감지하고 녹음 시작/종료를 제어
 
     """
-    def __init__(self, 
+
+    # __dict__ 해싱 대신 C 레벨 오프셋 접근 (개발 환경 python 3.9라 dataclass(slots=True) 대신 직접 선언)
+    __slots__ = ('is_recording', '_buf', '_cursor', 'stop_count',
+                 'silence_threshold', 'exit_threshold',
+                 '_wav_io', '_zero')
+
+    def __init__(self,
                  silence_threshold: int = AudioConfig.SILENCE_THRESHOLD,
                  exit_threshold: int = AudioConfig.EXIT_THRESHOLD):
         self.is_recording = False
-        self.speech_buffer = []
+        # 발화 전체를 담는 버퍼를 한 번만 할당 (리스트 append + concatenate 제거)
+        self._buf = np.empty(AudioConfig.MAX_UTTER_SEC * AudioConfig.SAMPLERATE,
+                             dtype=np.float32)
+        self._cursor = 0
         self.stop_count = 0
         self.silence_threshold = silence_threshold
         self.exit_threshold = exit_threshold
+        # 녹음 중 증분 인코딩용 메모리 내 WAV (Finished 시점에 업로드 준비 완료 상태)
+        self._wav_io = None
+        self._zero = None  # 무음 기록용 공유 제로 바이트 스크래치
+
+    def _open_wav(self):
+        """녹음 시작 시 헤더 자리만 확보하고 이후 raw PCM 바이트를 이어붙임"""
+        self._wav_io = io.BytesIO()
+        self._wav_io.write(_make_wav_header(0, AudioConfig.SAMPLERATE))
+
+    def _write_wav(self, chunk: np.array):
+        """청크를 int16 PCM 바이트로 기록 (libsndfile 호출 없이 tobytes 한 번)"""
+        if chunk.dtype == np.int16:
+            self._wav_io.write(chunk.tobytes())
+        else:
+            self._wav_io.write((chunk * 32767.0).astype(np.int16).tobytes())
+
+    def _write_wav_silence(self, n: int):
+        """무음 구간을 WAV에 기록 (공유 제로 바이트 재사용)"""
+        nbytes = n * 2
+        if self._zero is None or len(self._zero) < nbytes:
+            self._zero = bytes(max(nbytes, 16384))
+        self._wav_io.write(self._zero[:nbytes])
+
+    def _close_wav(self):
+        """data 크기를 반영한 헤더로 패치하고 업로드 가능한 버퍼를 반환"""
+        wav_io = self._wav_io
+        self._wav_io = None
+        data_len = wav_io.tell() - _WAV_HEADER_SIZE
+        wav_io.seek(0)
+        wav_io.write(_make_wav_header(data_len, AudioConfig.SAMPLERATE))
+        wav_io.seek(0)
+        return wav_io
+
+    def _discard_wav(self):
+        """열려 있는 WAV 버퍼를 폐기 (리셋 시)"""
+        self._wav_io = None
+
+    def _ensure_capacity(self, n: int):
+        """버퍼 잔여 공간을 보장 (부족하면 2배로 확장)"""
+        if self._cursor + n > self._buf.size:
+            self._buf = np.resize(self._buf, self._buf.size * 2)
 
     def resetStream(self):
         """스트림 상태 초기화"""
         self.is_recording = False
-        self.speech_buffer = []
+        self._cursor = 0
         self.stop_count = 0
-        return {"audio": None, "status": "Reset"}
+        self._discard_wav()
+        return {"audio": None, "wav": None, "status": "Reset"}
 
     def __call__(self, 
                  speech_detected: list,
@@ -118,55 +209,62 @@ class _AudioActivityDetection:
                                 그렇지 않으면 None, 최종 웨이브 파일이 생성되기 전까지 반환을 None으로함         
         """
         has_speech = len(speech_detected) > 0
-        user_status = "Silent" #없으면 Silent, 강제 종료되면 Error로 전송
         user_audio = None
-        
-        
-        if has_speech:
-            if not self.is_recording:
-                self.is_recording = True
-                self.stop_count = 0
-                self.speech_buffer = []
-                user_status = "Speech"
-                print("🎤 음성 시작")
-            
-            self.speech_buffer.append(audio_buffer)
-            
-            if self.stop_count > 0:
-                print(f"음성 재감지 → 무음 카운트 리셋 ({self.stop_count} → 0)")
-                self.stop_count = 0
-            
-        else:  # 무음
-            if self.is_recording:
-                zero_data = np.zeros_like(audio_buffer)
-                self.speech_buffer.append(zero_data)
-                self.stop_count += 1
-                user_status = "Speech" #무음이어도 녹음중이니 Speech로 전송
-                
-                print(f"연속 무음: {self.stop_count}/{self.silence_threshold}")
-                
-                if self.stop_count >= self.silence_threshold:
-                    speech_data = np.concatenate(self.speech_buffer, axis=0)
-                    self.is_recording = False
-                    self.stop_count = 0
-                    self.speech_buffer = []
-                    user_audio = speech_data
-                    user_status = "Finished"
-                    
-            else:
-                self.stop_count += 1
-                if self.stop_count >= self.exit_threshold:
-                    print(f"❌ 연속 {self.exit_threshold}번 무음으로 시스템 종료")
-                    user_audio = None
-                    user_status = "Error"
-                else:
-                    user_status = "Silent"
 
+        chunk = audio_buffer.ravel()
+        if chunk.dtype != np.int16:
+            chunk = np.ascontiguousarray(chunk, dtype=np.float32)
+        else:
+            chunk = np.ascontiguousarray(chunk)
+        if chunk.dtype != self._buf.dtype:
+            # int16 입력이면 누적 버퍼도 int16으로 유지 (복사 대역폭 절반)
+            self._buf = np.empty(self._buf.size, dtype=chunk.dtype)
+            self._cursor = 0
+        self._ensure_capacity(chunk.shape[0])
+
+        # 핫패스 속성 접근을 로컬로 호이스팅
+        buf = self._buf
+        was_recording = self.is_recording
+        prev_stop = self.stop_count
 
-        return {"audio": user_audio, "status": user_status}
+        # 분기/카운터/버퍼 기록은 컴파일된 코어에 위임
+        self.is_recording, self._cursor, self.stop_count, code = _vad_core.step(
+            has_speech, was_recording, self._cursor, prev_stop,
+            self.silence_threshold, self.exit_threshold, buf, chunk)
+
+        user_wav = None
+        if has_speech:
+            if not was_recording:
+                logger.debug("🎤 음성 시작")
+                self._open_wav()
+            # 캡처와 동시에 WAV 인코딩 (발화 종료 후 일괄 인코딩 제거)
+            self._write_wav(chunk)
+            if prev_stop > 0:
+                logger.debug("음성 재감지 → 무음 카운트 리셋 (%d → 0)", prev_stop)
+        elif was_recording:
+            self._write_wav_silence(chunk.shape[0])
+            logger.debug("연속 무음: %d/%d", prev_stop + 1, self.silence_threshold)
+            if code == _vad_core.STATUS_FINISHED:
+                user_audio = buf[:self._cursor].copy()
+                self._cursor = 0
+                user_wav = self._close_wav()
+        elif code == _vad_core.STATUS_ERROR:
+            logger.warning("❌ 연속 %d번 무음으로 시스템 종료", self.exit_threshold)
+
+        return {"audio": user_audio, "wav": user_wav,
+                "status": _vad_core.STATUS_NAMES[code]}
 
 _event_checker = _AudioActivityDetection()
-_vad_model = VADModel(monitoring=False)
+
+
+@functools.cache
+def get_vad_model() -> VADModel:
+    """VAD 모델 싱글톤 팩토리 (최초 호출 시 1회만 로드)"""
+    return VADModel(monitoring=False)
+
+
+# import 시 미리 로드 + 더미 호출로 Torch 워밍업 (첫 실제 요청이 로드 지연을 떠안지 않도록)
+get_vad_model().get_speech_timestamps(np.zeros(1600, dtype=np.float32))
 
 def process_audio_chunk(audio_data,
                         reset:bool=False)-> dict:
@@ -189,8 +287,8 @@ def process_audio_chunk(audio_data,
             "text": 변환된 텍스트 또는 None
         }
     """
-    event_checker = _event_checker  
-    vad_model = _vad_model
+    event_checker = _event_checker
+    vad_model = get_vad_model()
     
     result_status = None
     transcript_text = None
@@ -200,20 +298,33 @@ def process_audio_chunk(audio_data,
         return {"status": result["status"], "text": None}
 
     if audio_data is not None:
-        speech_timestamps = vad_model.get_speech_timestamps(audio_data)
-        result = event_checker(speech_timestamps, audio_data)
+        # dtype/레이아웃 정규화는 여기서 한 번만 수행 (이후 단계는 같은 배열을 공유)
+        chunk = audio_data.ravel()
+        if chunk.dtype != np.int16:
+            chunk = np.ascontiguousarray(chunk, dtype=np.float32)
+        else:
+            chunk = np.ascontiguousarray(chunk)
+
+        # 명백한 무음이면 silero forward pass를 건너뜀 (컴파일된 단일 패스 피크 검사)
+        threshold = AudioConfig.SILENCE_PEAK
+        if chunk.dtype == np.int16:
+            threshold *= 32768.0
+        if _vad_core.peak_below(chunk, threshold):
+            speech_timestamps = []
+        else:
+            speech_timestamps = vad_model.get_speech_timestamps(chunk)
+        result = event_checker(speech_timestamps, chunk)
                 
         if result["status"] == "Finished":
-            # 임시 파일로 저장
-            sf.write("temp_audio.wav", result["audio"], samplerate=AudioConfig.SAMPLERATE)
+            # 녹음 중 증분 인코딩된 메모리 내 WAV를 바로 업로드
+            wav_buf = result["wav"]
 
             # OpenAI Whisper API로 전사
-            with open("temp_audio.wav", "rb") as audio_file:
-                response = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="ko"
-                )
+            response = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=("audio.wav", wav_buf, "audio/wav"),
+                language="ko"
+            )
 
             result_status = result["status"]
             transcript_text = response.text
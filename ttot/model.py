@@ -24,10 +24,16 @@ def run_model(user_text: Optional[str], audio_path: Optional[str]) -> Dict[str,
     # 오디오 정보
     if audio_path:
         p = Path(audio_path)
-        if p.exists():
+        try:
+            # exists() + stat() 두 번의 syscall 대신 stat() 한 번으로 확인 (EAFP)
+            size = p.stat().st_size
+        except OSError:
+            info["audio_found"] = False
+            info["note"] = "경로는 있으나 파일이 존재하지 않습니다."
+        else:
             info["audio_found"] = True
             info["audio_name"] = p.name
-            info["audio_size_bytes"] = p.stat().st_size
+            info["audio_size_bytes"] = size
 
             # ✅ 웹에서 재생 가능한 URL 추가
             rel = str(p).replace("\\", "/")
@@ -36,9 +42,6 @@ def run_model(user_text: Optional[str], audio_path: Optional[str]) -> Dict[str,
             info["audio_url"] = f"/static/{rel}"
 
             info["note"] = "오디오 파일이 감지되어 처리 대상으로 전달했습니다."
-        else:
-            info["audio_found"] = False
-            info["note"] = "경로는 있으나 파일이 존재하지 않습니다."
     else:
         info["audio_found"] = False
         info["note"] = "텍스트를 처리했습니다."